@@ -1,21 +1,162 @@
 from skybeard.beards import BeardChatHandler
 from skybeard.bearddbtable import BeardDBTable
-from skybeard.utils import get_args
+from skybeard.utils import get_beard_config
 from skybeard.decorators import onerror
 from skybeard.mixins import PaginatorMixin
 
-from pygithub3 import Github
+import asyncio
+import atexit
+import itertools
+from typing import Dict, Optional
+
+import aiohttp
+from gidgethub.sansio import format_url
 
 from . import format_
-from .decorators import get_args_as_str_or_ask
+from .graphql import gql_list_open_pulls
+from .cache import LRUCache, async_ttl
+from .ratelimit import GHRateLimiter, IntervalLimiter, ResourceGitHubAPI
+from .decorators import cached_get_args, get_args_as_str_or_ask
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+CONFIG = get_beard_config()
+
+DEFAULT_REPO_MSG = "Default repo for this chat: {}"
+REPO_SET_MSG = "Repo set to: {}"
+NO_PULLS_MSG = "No pull requests found for {}."
+
+# Telegram's maximum message length.
+MAX_MSG_LEN = 4096
+
+# Keeps sends under Telegram's limits of 30 messages per second for the bot
+# and about one message per second in each chat.
+_TG_LIMITER = IntervalLimiter(1 / 30)
+CHAT_SEND_INTERVAL = 1
+
+# Requests are spread round-robin over every configured token, each of which
+# has its own rate limit.
+_TOKENS = CONFIG.get('tokens') or [CONFIG['token']]
+_TOKEN_CYCLE = itertools.cycle(_TOKENS)
+_LIMITERS = {token: GHRateLimiter() for token in _TOKENS}
+
+# Most open pull requests /getpr will fetch and send. GitHub's GraphQL API
+# returns at most 100 per query.
+MAX_PULLS = CONFIG.get('max_pulls', 50)
+if MAX_PULLS > 100:
+    logger.warning(
+        "max_pulls is %s but at most 100 pull requests can be fetched; "
+        "using 100.", MAX_PULLS)
+    MAX_PULLS = 100
+
+# ETags and bodies of GitHub responses, so repeat requests can be made
+# conditionally; 304 responses do not count against the rate limit. They are
+# kept per token, as GitHub's responses vary with the Authorization header.
+_ETAG_CACHES = {token: LRUCache(maxsize=1024) for token in _TOKENS}
+
+_SESSION: Optional[aiohttp.ClientSession] = None
+_SESSION_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """Gets the HTTP session shared by every GithubBeard instance.
+
+    The session is created on first use so that it is bound to the running
+    event loop, and it is reused so that every chat shares the same pool of
+    keep-alive connections to api.github.com.
+    """
+    global _SESSION, _SESSION_LOOP
+    if _SESSION is None or _SESSION.closed:
+        _SESSION_LOOP = asyncio.get_running_loop()
+        _SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=20,
+                keepalive_timeout=75,
+                enable_cleanup_closed=True))
+    return _SESSION
+
+
+@atexit.register
+def _close_session():
+    """Closes the shared HTTP session on interpreter shutdown.
+
+    The session can only be closed on the loop it was created on. If that
+    loop is closed or still running, the session is detached from its
+    connector instead, as the process is exiting anyway.
+    """
+    if _SESSION is None or _SESSION.closed:
+        return
+    loop = _SESSION_LOOP
+    try:
+        if loop is not None and not loop.is_closed() and not loop.is_running():
+            loop.run_until_complete(_SESSION.close())
+            return
+    except RuntimeError:
+        logger.debug("Could not close the GitHub HTTP session.", exc_info=True)
+    _SESSION.detach()
+
+
+def _repo_url_vars(full_name):
+    """Splits "owner/repo" into url_vars for the GitHub API."""
+    owner, repo = full_name.split("/", 1)
+    return dict(owner=owner, repo=repo)
+
+
+def _url_key(github, url, url_vars):
+    """Keys cached GitHub responses on the expanded URL."""
+    return format_url(url, url_vars)
+
+
+@async_ttl(ttl=60, key=_url_key)
+async def _getitem(github, url, url_vars):
+    """Gets a single GitHub resource, cached for a minute."""
+    return await _LIMITERS[github.oauth_token].call(
+        github, github.getitem, url, url_vars=url_vars)
+
+
+def _pulls_key(github, repo_name, first):
+    """Keys cached pull request lists on the repo and count."""
+    return repo_name, first
+
+
+@async_ttl(ttl=60, key=_pulls_key)
+async def _get_open_pulls(github, repo_name, first):
+    """Gets the newest open pull requests of a repo, cached for a minute."""
+    url_vars = _repo_url_vars(repo_name)
+    return await _LIMITERS[github.oauth_token].call(
+        github, gql_list_open_pulls,
+        github, url_vars['owner'], url_vars['repo'], first)
+
+
+def _join_messages(texts, sep="\n\n"):
+    """Joins texts into as few messages as fit in MAX_MSG_LEN.
+
+    Texts are never split, so a text longer than MAX_MSG_LEN gets a message
+    of its own.
+    """
+    chunks = []
+    length = 0
+    for text in texts:
+        if chunks and length + len(sep) + len(text) <= MAX_MSG_LEN:
+            chunks[-1].append(text)
+            length += len(sep) + len(text)
+        else:
+            chunks.append([text])
+            length = len(text)
+    return [sep.join(chunk) for chunk in chunks]
+
 
 class GithubBeard(PaginatorMixin, BeardChatHandler):
 
+    # Default repo for each chat, shared by every instance.
+    _default_repo_cache: Dict[int, str] = {}
+
+    # Send limiter for each chat, shared by every instance.
+    _chat_limiters: Dict[int, IntervalLimiter] = {}
+
     __userhelp__ = "Github. In a beard."
 
     __commands__ = [
@@ -33,38 +174,61 @@ class GithubBeard(PaginatorMixin, BeardChatHandler):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.github = Github()
+        self._githubs = {
+            (token, resource): ResourceGitHubAPI(
+                _get_session(), "githubbeard", oauth_token=token,
+                cache=_ETAG_CACHES[token], resource=resource)
+            for token in _TOKENS
+            for resource in ('core', 'search', 'graphql')}
         self.default_repo_table = BeardDBTable(self, 'default_repo')
         self.search_repos_results = BeardDBTable(self, 'search_repos_results')
 
+    def github(self, resource='core'):
+        """Gets the next token's GitHub client for a rate limit resource."""
+        return self._githubs[next(_TOKEN_CYCLE), resource]
+
     @onerror
     @get_args_as_str_or_ask("What would you like to search github for?")
     async def search_repos(self, msg, args):
         await self.sender.sendChatAction('typing')
-        search_results = self.github.search_repositories(args)
-        search_results = [i for i in search_results[:30]]
+        search_results = await _getitem(
+            self.github('search'), "/search/repositories{?q,per_page}",
+            dict(q=args, per_page=30))
+        search_results = search_results['items'][:30]
 
         await self.send_paginated_message(
             search_results, format_.make_repo_msg_text)
 
-    @onerror
-    async def get_default_repo(self, msg):
+    def _lookup_default_repo(self):
+        """Gets the default repo for this chat, or None if it is not set."""
+        try:
+            return self._default_repo_cache[self.chat_id]
+        except KeyError:
+            pass
         with self.default_repo_table as table:
             entry = table.find_one(chat_id=self.chat_id)
-            if entry:
-                await self.sender.sendMessage(
-                    "Default repo for this chat: {}".format(entry['repo']))
-            else:
-                await self.sender.sendMessage("No repo set.")
+        if entry:
+            self._default_repo_cache[self.chat_id] = entry['repo']
+            return entry['repo']
+
+    @onerror
+    async def get_default_repo(self, msg):
+        repo = self._lookup_default_repo()
+        if repo:
+            await self.sender.sendMessage(DEFAULT_REPO_MSG.format(repo))
+        else:
+            await self.sender.sendMessage("No repo set.")
 
     @onerror
     @get_args_as_str_or_ask("What would you like the default repo to be?")
     async def set_default_repo(self, msg, args):
         with self.default_repo_table as table:
-            entry = table.insert(dict(chat_id=self.chat_id, repo=args))
+            entry = table.upsert(
+                dict(chat_id=self.chat_id, repo=args), ['chat_id'])
 
             if entry:
-                await self.sender.sendMessage("Repo set to: {}".format(args))
+                self._default_repo_cache[self.chat_id] = args
+                await self.sender.sendMessage(REPO_SET_MSG.format(args))
             else:
                 raise Exception("Not sure how, but the entry failed to be got?")
 
@@ -76,27 +240,29 @@ class GithubBeard(PaginatorMixin, BeardChatHandler):
     @get_args_as_str_or_ask("Which repo would you like to get?")
     async def get_repo(self, msg, args):
         """Gets information about a github repo."""
-        repo = self.github.get_repo(args)
+        repo = await _getitem(
+            self.github(), "/repos/{owner}/{repo}", _repo_url_vars(args))
         await self.sender.sendMessage(await format_.make_repo_msg_text(repo),
                                       parse_mode='HTML')
 
     @onerror("Failed to get repo info.")
     async def get_pending_pulls(self, msg):
         """Gets information about a github repo."""
-        args = get_args(msg)
+        args = cached_get_args(msg)
         if args:
-            repo = self.github.get_repo(args[0])
+            repo_name = args[0]
         else:
-            with self.default_repo_table as table:
-                entry = table.find_one(chat_id=self.chat_id)
-            repo = self.github.get_repo(entry['repo'])
-        pull_requests = repo.get_pulls()
-
-        pr = None
-        for pr in pull_requests:
-            await self.sender.sendMessage(
-                await format_.make_pull_msg_text_informal(pr),
-                parse_mode='HTML')
-        if pr is None:
-            await self.sender.sendMessage(
-                "No pull requests found for {}.".format(repo.name))
+            repo_name = self._lookup_default_repo()
+        prs = await _get_open_pulls(
+            self.github('graphql'), repo_name, MAX_PULLS)
+        texts = await asyncio.gather(
+            *(format_.make_pull_msg_text_informal(pr) for pr in prs))
+
+        chat_limiter = self._chat_limiters.setdefault(
+            self.chat_id, IntervalLimiter(CHAT_SEND_INTERVAL))
+
+        for text in _join_messages(texts):
+            async with chat_limiter, _TG_LIMITER:
+                await self.sender.sendMessage(text, parse_mode='HTML')
+        if not prs:
+            await self.sender.sendMessage(NO_PULLS_MSG.format(repo_name))
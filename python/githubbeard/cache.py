@@ -0,0 +1,80 @@
+import asyncio
+import time
+from collections import OrderedDict
+from functools import wraps
+
+
+class LRUCache(OrderedDict):
+    """A dict which drops its least recently used entries past maxsize."""
+
+    def __init__(self, maxsize=1024):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            del self[next(iter(self))]
+
+
+def async_ttl(ttl=60, maxsize=1024, key=None):
+    """Caches the results of a coroutine function for ttl seconds.
+
+    Results are stored against key(*args, **kwargs), or against the arguments
+    themselves if no key function is given. Concurrent misses on the same key
+    share a single call of the function. Once maxsize entries are stored,
+    expired entries are dropped first and then the oldest ones, e.g.
+
+    .. code::python
+        @async_ttl(ttl=300)
+        async def get_user(github, login):
+            return await github.getitem("/users/{login}", url_vars=...)
+
+    """
+    def decorator(f):
+        cache = {}
+        pending = {}
+
+        async def fill(k, args, kwargs):
+            value = await f(*args, **kwargs)
+
+            now = time.monotonic()
+            if k not in cache and len(cache) >= maxsize:
+                for old_k in [i for i, v in cache.items() if v[1] <= now]:
+                    del cache[old_k]
+                while len(cache) >= maxsize:
+                    del cache[next(iter(cache))]
+            cache[k] = (value, now + ttl)
+
+            return value
+
+        @wraps(f)
+        async def g(*args, **kwargs):
+            if key is None:
+                k = (args, tuple(sorted(kwargs.items())))
+            else:
+                k = key(*args, **kwargs)
+
+            entry = cache.get(k)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+
+            task = pending.get(k)
+            if task is None:
+                task = asyncio.ensure_future(fill(k, args, kwargs))
+                pending[k] = task
+                task.add_done_callback(lambda _: pending.pop(k, None))
+
+            # Shielded so that one caller being cancelled does not cancel the
+            # fetch the other callers are waiting on.
+            return await asyncio.shield(task)
+
+        return g
+
+    return decorator
@@ -1,8 +1,22 @@
-from functools import wraps, partial
+from functools import wraps
 
 from skybeard.utils import get_args
 
 
+def cached_get_args(msg, return_string=False):
+    """Gets the arguments of msg, parsing them at most once per message.
+
+    The parsed arguments are stored on msg itself, so every handler or filter
+    that looks at the same message shares one parse.
+    """
+    key = '_parsed_args_str' if return_string else '_parsed_args'
+    try:
+        return msg[key]
+    except KeyError:
+        args = msg[key] = get_args(msg, return_string=return_string)
+        return args
+
+
 def get_args_as_str_or_ask(text):
     """Gets arguments as a string or asks the question in text.
 
@@ -30,21 +44,18 @@ def get_args_as_str_or_ask(text):
         < Hello, Reginald.
 
     """
-    return partial(_get_args_as_str_or_ask_decorator, text=text)
-
-
-def _get_args_as_str_or_ask_decorator(f, text):
-    """See get_args_as_str_or_ask for docs."""
-    @wraps(f)
-    async def g(beard, msg):
-        args = get_args(msg, return_string=True)
-        if not args:
-            await beard.sender.sendMessage(text)
-            resp = await beard.listener.wait()
+    def decorator(f):
+        @wraps(f)
+        async def g(beard, msg):
+            args = cached_get_args(msg, return_string=True)
+            if not args:
+                await beard.sender.sendMessage(text)
+                resp = await beard.listener.wait()
 
-            args = resp['text']
+                args = resp['text']
 
-        await f(beard, msg, args)
+            await f(beard, msg, args)
 
-    return g
+        return g
 
+    return decorator
@@ -3,33 +3,37 @@ import maya
 
 async def make_pull_msg_text(pull):
     """Creates basic message text for pull request."""
-    retval = ""
-    retval += "<b>Title</b>: {}\n".format(pull.title)
-    retval += "<b>Created at</b>: {}\n".format(pull.created_at)
-    retval += "<b>Body</b>: {}\n".format(pull.body)
+    lines = [
+        f"<b>Title</b>: {pull['title']}",
+        f"<b>Created at</b>: {pull['created_at']}",
+        f"<b>Body</b>: {pull['body']}",
+    ]
 
-    return retval
+    return "\n".join(lines) + "\n"
 
 
 async def make_pull_msg_text_informal(pull):
     """Creates informal message text for pull request."""
-    retval = "<b>Pull request {} for {}</b>\n\n".format(
-        pull.number, pull.base.repo.name)
-    retval += "{} (created {})\n".format(
-        pull.title,
-        maya.MayaDT.from_datetime(pull.created_at).slang_date())
-    if pull.body:
-        retval += "{}\n".format(pull.body)
-    retval += "\n{}".format(pull.url)
+    created = maya.parse(pull['created_at']).slang_date()
+    lines = [
+        f"<b>Pull request {pull['number']} for "
+        f"{pull['base']['repo']['name']}</b>",
+        "",
+        f"{pull['title']} (created {created})",
+    ]
+    if pull['body']:
+        lines.append(pull['body'])
+    lines += ["", pull['url']]
 
-    return retval
+    return "\n".join(lines)
 
 
 async def make_repo_msg_text(repo):
     """Creates message text for repo"""
-    retval = "<b>Repository:</b> {}\n".format(repo.full_name)
-    if repo.description:
-        retval += "<b>Description:</b> {}\n".format(repo.description.split("\n")[0].split(".")[0])
-    retval += "<b>Url:</b> {}".format(repo.html_url)
+    lines = [f"<b>Repository:</b> {repo['full_name']}"]
+    if repo['description']:
+        summary = repo['description'].split("\n")[0].split(".")[0]
+        lines.append(f"<b>Description:</b> {summary}")
+    lines.append(f"<b>Url:</b> {repo['html_url']}")
 
-    return retval
+    return "\n".join(lines)
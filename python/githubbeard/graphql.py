@@ -0,0 +1,38 @@
+OPEN_PULLS_QUERY = """
+query($owner: String!, $repo: String!, $first: Int!) {
+  repository(owner: $owner, name: $repo) {
+    name
+    pullRequests(states: OPEN, first: $first,
+                 orderBy: {field: CREATED_AT, direction: DESC}) {
+      nodes {
+        number
+        title
+        body
+        createdAt
+        url
+      }
+    }
+  }
+}
+"""
+
+
+async def gql_list_open_pulls(github, owner, repo, first):
+    """Gets the newest open pull requests of a repo in a single request.
+
+    The pull requests are returned in the shape of the REST API's pull request
+    objects, limited to the fields used by format_.
+    """
+    data = await github.graphql(
+        OPEN_PULLS_QUERY, owner=owner, repo=repo, first=first)
+    repository = data['repository']
+
+    return [
+        dict(number=node['number'],
+             title=node['title'],
+             body=node['body'],
+             created_at=node['createdAt'],
+             url=node['url'],
+             base=dict(repo=dict(name=repository['name'])))
+        for node in repository['pullRequests']['nodes']
+    ]
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+from gidgethub import BadGraphQLRequest, BadRequest, RateLimitExceeded
+from gidgethub.aiohttp import GitHubAPI
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceGitHubAPI(GitHubAPI):
+    """A gidgethub client used for one GitHub rate limit resource.
+
+    GitHub keeps separate rate limits for e.g. the core REST API, search and
+    GraphQL. gidgethub stores the rate limit of the last response on the
+    client, so a client per resource means that value always belongs to
+    ``resource``.
+    """
+
+    def __init__(self, *args, resource='core', **kwargs):
+        super().__init__(*args, **kwargs)
+        self.resource = resource
+
+
+class IntervalLimiter:
+    """Spaces entries into ``async with`` at least interval seconds apart.
+
+    Callers that arrive early wait their turn, in the order they arrived.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = asyncio.Lock()
+        self._next = 0.0
+
+    async def __aenter__(self):
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+            self._next = max(now, self._next) + self.interval
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+def _is_secondary_limit(exc):
+    """Whether exc is GitHub refusing a request for its secondary limit."""
+    if exc.status_code == 429:
+        return True
+    message = str(exc).lower()
+    return exc.status_code == 403 and (
+        "secondary rate limit" in message or "abuse" in message)
+
+
+def _retry_after(exc):
+    """Gets how many seconds GitHub asked us to wait in exc, if it did."""
+    headers = {k.lower(): v for k, v in (exc.headers or {}).items()}
+    if headers.get('retry-after', '').isdigit():
+        return int(headers['retry-after'])
+    if (headers.get('x-ratelimit-remaining') == '0'
+            and 'x-ratelimit-reset' in headers):
+        return max(int(headers['x-ratelimit-reset']) - time.time(), 0)
+    return None
+
+
+class GHRateLimiter:
+    """Keeps GitHub requests for one token within GitHub's rate limits.
+
+    At most ``concurrency`` requests are in flight at once. The primary rate
+    limit of each resource is remembered from its last response, and once it
+    is used up requests for that resource queue until it resets rather than
+    spending a round trip to be refused. If the reset is more than
+    ``max_reset_wait`` seconds away they fail straight away instead, so a
+    chat is not left waiting for up to an hour.
+
+    Requests refused by the secondary (abuse) limit are retried, waiting as
+    long as GitHub's Retry-After or rate limit reset headers ask and
+    otherwise backing off exponentially.
+    """
+
+    def __init__(self, concurrency=8, attempts=6, max_wait=32,
+                 max_reset_wait=60):
+        self._sem = asyncio.Semaphore(concurrency)
+        self.attempts = attempts
+        self.max_wait = max_wait
+        self.max_reset_wait = max_reset_wait
+        self.rate_limits = {}
+
+    async def _wait_for_reset(self, resource):
+        """Waits for resource's used up primary rate limit to reset."""
+        rate_limit = self.rate_limits.get(resource)
+        if rate_limit is None or rate_limit:
+            return
+        wait = (rate_limit.reset_datetime
+                - datetime.now(timezone.utc)).total_seconds()
+        if wait > self.max_reset_wait:
+            raise RateLimitExceeded(rate_limit)
+        logger.info(
+            "GitHub %s rate limit used up, waiting %.0fs for it to reset.",
+            resource, wait)
+        await asyncio.sleep(max(wait, 0))
+
+    async def call(self, github, f, *args, **kwargs):
+        """Awaits f(*args, **kwargs), which makes requests through github.
+
+        github should be a ResourceGitHubAPI, whose resource picks the rate
+        limit the request counts against.
+        """
+        resource = github.resource
+        for attempt in range(self.attempts):
+            await self._wait_for_reset(resource)
+            async with self._sem:
+                last_rate_limit = github.rate_limit
+                try:
+                    result = await f(*args, **kwargs)
+                except RateLimitExceeded as e:
+                    self.rate_limits[resource] = e.rate_limit
+                    if attempt == self.attempts - 1:
+                        raise
+                    continue
+                except (BadRequest, BadGraphQLRequest) as e:
+                    if (not _is_secondary_limit(e)
+                            or attempt == self.attempts - 1):
+                        raise
+                    retry_after = _retry_after(e)
+                else:
+                    # Only a value set by this call describes it; a call
+                    # that made no request leaves the old one in place.
+                    if (github.rate_limit is not None
+                            and github.rate_limit is not last_rate_limit):
+                        self.rate_limits[resource] = github.rate_limit
+                    return result
+
+            if retry_after is None:
+                wait = min(2 ** attempt, self.max_wait)
+            else:
+                wait = max(retry_after, 2 ** attempt)
+            logger.warning(
+                "GitHub refused request (secondary rate limit), "
+                "retrying in %.0fs.", wait)
+            await asyncio.sleep(wait)